@@ -1,14 +1,26 @@
 import asyncio
+import hashlib
+import json
 import os
+import random
 import re
-import json
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, asdict
 from typing import List, Optional, Tuple, Dict
-from urllib.parse import urljoin, urlparse, quote_plus
+from html import unescape as html_unescape
+from urllib.parse import urljoin, urlparse, quote_plus, unquote, parse_qsl, urlencode
 
 import httpx
-from bs4 import BeautifulSoup
+try:
+    import orjson
+except ImportError:  # optional speedup; json_dumps/json_loads fall back to stdlib json
+    orjson = None
+from lxml import etree, html as lxml_html
+from aiolimiter import AsyncLimiter
 from google import genai
+from google.genai import errors as genai_errors, types as genai_types
 from openpyxl import Workbook
 
 
@@ -28,7 +40,7 @@ from openpyxl import Workbook
 #   - Hotel Name
 #   - ZoomInfo Category (if available)
 #   - ZoomInfo Score (if available)
-#   - GDS Chain Code (Gemini)
+#   - GDS Chain Code (TravelWeekly GDS listing, else Gemini)
 #   - Booking Vendor (fingerprinted from evidence)
 #   - Vendor Evidence URL
 #   - Confidence (High/Medium/Low)
@@ -40,26 +52,133 @@ from openpyxl import Workbook
 # ==========================================================
 
 VERSION = "2026-02-06.1"
-print(f"🔥 HOTEL AGENT VERSION: {VERSION} 🔥")
 
 EMAIL_INPUT = (os.environ.get("EMAIL_INPUT") or "").strip()
 GEMINI_API_KEY = (os.environ.get("GEMINI_API_KEY") or "").strip()
 
+# Max properties processed at once (hotels in a ZoomInfo list are independent)
+HOTEL_CONCURRENCY = max(1, int(os.environ.get("HOTEL_CONCURRENCY") or "3"))
+
 ART_DIR = "screenshots"
-os.makedirs(ART_DIR, exist_ok=True)
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """
+    UTF-8 JSON bytes via orjson when installed; stdlib output is kept byte-identical
+    for the compact form so prompt/cache keys don't depend on which one is present.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def json_loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
 
 def write_text(filename: str, content: str) -> None:
     with open(os.path.join(ART_DIR, filename), "w", encoding="utf-8") as f:
         f.write(content)
 
 def write_json(filename: str, obj) -> None:
-    with open(os.path.join(ART_DIR, filename), "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2)
+    with open(os.path.join(ART_DIR, filename), "wb") as f:
+        f.write(json_dumps(obj, indent=True))
+
+# Async variants run the blocking file I/O in a worker thread, so status
+# updates during the hotel fan-out don't stall in-flight fetches
+_artifact_lock = asyncio.Lock()
+
+async def write_text_async(filename: str, content: str) -> None:
+    async with _artifact_lock:
+        await asyncio.to_thread(write_text, filename, content)
+
+async def write_json_async(filename: str, obj) -> None:
+    async with _artifact_lock:
+        await asyncio.to_thread(write_json, filename, obj)
+
+_gemini_client: Optional[genai.Client] = None
+
+def gemini_client() -> Optional[genai.Client]:
+    """
+    Shared Gemini client, created on first use; None when GEMINI_API_KEY is unset.
+    """
+    global _gemini_client
+    if _gemini_client is None and GEMINI_API_KEY:
+        _gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+    return _gemini_client
 
-# Ensure at least one artifact exists
-write_text("RUN_STATUS.txt", "starting\n")
+GEMINI_MODEL = "gemini-2.0-flash"
+# Every prompt asks for JSON; have the API enforce it instead of parsing prose
+GEMINI_JSON_CONFIG = genai_types.GenerateContentConfig(response_mime_type="application/json")
 
-client = genai.Client(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
+# Token bucket shared by every Gemini call, sized to the per-minute quota.
+GEMINI_LIMITER = AsyncLimiter(max_rate=int(os.environ.get("GEMINI_RPM") or "60"), time_period=60)
+
+class AdaptiveConcurrency:
+    """
+    AIMD gate on in-flight requests: a quota error (429) halves the limit,
+    every `increase_every` successes add one back, like TCP congestion control.
+    slot() yields the decrease epoch it started in; a burst of 429s from requests
+    that were all in flight before the last decrease halves the limit only once.
+    """
+    def __init__(self, initial: int, minimum: int, maximum: int, increase_every: int = 5):
+        self.limit = max(minimum, min(initial, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase_every = increase_every
+        self._in_flight = 0
+        self._successes = 0
+        self._epoch = 0
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+            epoch = self._epoch
+        try:
+            yield epoch
+        finally:
+            async with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    async def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.increase_every and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+            # Wake blocked slot() callers so the new slot is used right away
+            async with self._cond:
+                self._cond.notify_all()
+
+    def on_overload(self, epoch: int) -> None:
+        if epoch != self._epoch:
+            return  # already backed off for this congestion event
+        self._epoch += 1
+        self.limit = max(self.minimum, self.limit // 2)
+        self._successes = 0
+        print(f"⚠️ Gemini quota hit; concurrency limit now {self.limit}.")
+
+GEMINI_CONCURRENCY = AdaptiveConcurrency(
+    initial=4,
+    minimum=1,
+    maximum=max(1, int(os.environ.get("GEMINI_MAX_CONCURRENCY") or "16")),
+)
+
+@asynccontextmanager
+async def gemini_slot():
+    """
+    Gate around one live Gemini request: AIMD concurrency, then the token bucket.
+    """
+    async with GEMINI_CONCURRENCY.slot() as epoch, GEMINI_LIMITER:
+        try:
+            yield
+        except genai_errors.APIError as e:
+            if e.code == 429:
+                GEMINI_CONCURRENCY.on_overload(epoch)
+            raise
+    await GEMINI_CONCURRENCY.on_success()
 
 # --- Bot wall indicators (we do not bypass, only detect) ---
 BOT_BLOCK_PATTERNS = [
@@ -74,11 +193,54 @@ BOT_BLOCK_PATTERNS = [
     "security check",
 ]
 
+def literal_alternation(patterns: List[str]) -> "re.Pattern[str]":
+    """
+    Compiles a literal pattern list into one case-insensitive alternation, so
+    a single scan replaces a Python loop of substring checks. Longest first,
+    so overlapping literals report the most specific match.
+    """
+    return re.compile("|".join(re.escape(p) for p in sorted(patterns, key=len, reverse=True)), re.IGNORECASE)
+
+BOT_BLOCK_RE = literal_alternation(BOT_BLOCK_PATTERNS)
+
+# Challenge/verification wording sits at the top of the page; scanning only
+# this many chars bounds the cost on huge pages and avoids matching e.g. a
+# cdnjs.cloudflare.com script include deep in a normal site's footer
+CLASSIFY_WINDOW = 65536
+
 def looks_like_bot_block(html: str) -> bool:
+    return bool(html) and BOT_BLOCK_RE.search(html, 0, CLASSIFY_WINDOW) is not None
+
+# --- HTML parsing (lxml, C-backed) ---
+# Pages arrive already decoded by httpx; force UTF-8 on re-encode so a stale
+# <meta charset> or XML declaration can't make lxml reject or mis-decode them.
+_LXML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+def html_tree(html: str):
+    """
+    Parsed lxml tree for html, or None when there's nothing parseable.
+    """
     if not html:
-        return False
-    s = html.lower()
-    return any(p in s for p in BOT_BLOCK_PATTERNS)
+        return None
+    try:
+        return lxml_html.fromstring(html.encode("utf-8"), parser=_LXML_PARSER)
+    except (ValueError, etree.ParserError):
+        return None
+
+def element_text(el) -> str:
+    """
+    Visible text of an element, whitespace-stripped pieces joined by spaces.
+    """
+    return " ".join(t.strip() for t in el.itertext() if t.strip())
+
+def anchor_hrefs(html: str) -> List[str]:
+    """
+    All <a href> values in document order; skips building anything but the tree.
+    """
+    tree = html_tree(html)
+    if tree is None:
+        return []
+    return [str(h).strip() for h in tree.xpath("//a/@href")]
 
 def normalize_url(u: str, base: Optional[str] = None) -> str:
     u = (u or "").strip()
@@ -95,6 +257,31 @@ def normalize_url(u: str, base: Optional[str] = None) -> str:
 def host(url: str) -> str:
     return (urlparse(url).netloc or "").lower()
 
+# Query params that only tag campaigns/clicks and never change the page
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl"}
+
+def url_dedupe_key(u: str) -> Tuple[str, str, str, str]:
+    """
+    Identity of a URL for de-duping: scheme/host case-folded, trailing slash,
+    fragment and tracking params dropped. Other query params are kept since
+    booking engines identify the property there (e.g. ?hotel=12345).
+    """
+    p = urlparse(u)
+    params = sorted(
+        (k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if not (k.lower().startswith("utm_") or k.lower() in TRACKING_PARAMS)
+    )
+    return p.scheme.lower(), p.netloc.lower(), p.path.rstrip("/"), urlencode(params)
+
+def dedupe_urls(urls: List[str]) -> List[str]:
+    """
+    Order-preserving de-dupe on url_dedupe_key; the first spelling seen wins.
+    """
+    out: Dict[Tuple[str, str, str, str], str] = {}
+    for u in urls:
+        out.setdefault(url_dedupe_key(u), u)
+    return list(out.values())
+
 # --- Booking vendor fingerprints ---
 VENDOR_PATTERNS: Dict[str, List[str]] = {
     "SynXis (Sabre Hospitality)": [
@@ -124,25 +311,63 @@ AFFILIATE_PATTERNS = [
     "reservations.com",
 ]
 
+# URL fragments that suggest a booking/reservation page. Three lists on purpose:
+# the scoring/search hint, the stricter Unknown -> Medium bump (a bare
+# "reservation" doesn't count) and the HTML link filter ("/availability" only).
+BOOKING_HINT_PATTERNS = ["/book", "/booking", "/reservations", "reservation", "availability"]
+BOOKING_PAGE_PATTERNS = ["/book", "/booking", "/reservations", "availability"]
+BOOKING_LINK_PATTERNS = ["/booking", "/book", "/reservations", "/availability", "reservation"]
+
+VENDOR_RES = {vendor: literal_alternation(patterns) for vendor, patterns in VENDOR_PATTERNS.items()}
+ANY_VENDOR_RE = literal_alternation([p for plist in VENDOR_PATTERNS.values() for p in plist])
+AFFILIATE_RE = literal_alternation(AFFILIATE_PATTERNS)
+BOOKING_HINT_RE = literal_alternation(BOOKING_HINT_PATTERNS)
+BOOKING_PAGE_RE = literal_alternation(BOOKING_PAGE_PATTERNS)
+BOOKING_LINK_RE = literal_alternation(BOOKING_LINK_PATTERNS)
+
+def looks_like_vendor_evidence(url: str, booking_re: re.Pattern = BOOKING_HINT_RE) -> bool:
+    """
+    True for URLs worth keeping as evidence: vendor, affiliate or booking-ish
+    (per booking_re; links pulled from page HTML pass BOOKING_LINK_RE).
+    """
+    return bool(ANY_VENDOR_RE.search(url) or AFFILIATE_RE.search(host(url)) or booking_re.search(url))
+
 def classify_vendor_from_url(url: str) -> Tuple[str, str]:
     """
     Returns (vendor_name, confidence_band).
     confidence_band is only based on URL match strength.
     """
-    u = (url or "").lower()
-    h = host(url)
+    u = url or ""
 
-    for vendor, patterns in VENDOR_PATTERNS.items():
-        for p in patterns:
-            if p.lower() in u or p.lower() in h:
-                return vendor, "High"
+    for vendor, pattern in VENDOR_RES.items():
+        if pattern.search(u):
+            return vendor, "High"
 
-    for a in AFFILIATE_PATTERNS:
-        if a in h:
-            return "Affiliate/OTA (Not official CRS)", "Low"
+    if AFFILIATE_RE.search(host(u)):
+        return "Affiliate/OTA (Not official CRS)", "Low"
 
     return "Unknown", "Low"
 
+VENDOR_MATCH_SCORE = 100
+BOOKING_HINT_SCORE = 15
+
+def score_evidence_url(url: str) -> Tuple[int, str, str, bool]:
+    """
+    Classify one evidence URL in a single pass.
+    Returns (score, vendor, confidence_band, booking_hint).
+    """
+    vendor, conf = classify_vendor_from_url(url)
+    booking = BOOKING_HINT_RE.search(url) is not None
+    score = 0
+    if conf == "High":
+        score += VENDOR_MATCH_SCORE
+    if vendor == "Affiliate/OTA (Not official CRS)":
+        score += 10
+    # booking-ish hint
+    if booking:
+        score += BOOKING_HINT_SCORE
+    return score, vendor, conf, booking
+
 def best_vendor_from_evidence(evidence_urls: List[str]) -> Tuple[str, str, str]:
     """
     Pick best vendor + evidence URL + confidence based on evidence list.
@@ -155,25 +380,16 @@ def best_vendor_from_evidence(evidence_urls: List[str]) -> Tuple[str, str, str]:
     if not evidence_urls:
         return "Unknown", "", "Low"
 
-    # Score each URL
-    scored = []
+    # Score each URL once and keep the first top scorer; no full sort needed
+    best = None
     for u in evidence_urls:
-        vendor, conf = classify_vendor_from_url(u)
-        score = 0
-        if conf == "High":
-            score += 100
-        if vendor == "Affiliate/OTA (Not official CRS)":
-            score += 10
-        # booking-ish hint
-        if any(x in (u.lower()) for x in ["/book", "/booking", "/reservations", "reservation", "availability"]):
-            score += 15
-        scored.append((score, vendor, conf, u))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    _, vendor, conf, url = scored[0]
+        score, vendor, conf, _ = score_evidence_url(u)
+        if best is None or score > best[0]:
+            best = (score, vendor, conf, u)
+    _, vendor, conf, url = best
 
     # If it’s unknown but still booking-ish, bump to Medium
-    if vendor == "Unknown" and any(x in url.lower() for x in ["/book", "/booking", "/reservations", "availability"]):
+    if vendor == "Unknown" and BOOKING_PAGE_RE.search(url):
         conf = "Medium"
 
     return vendor, url, conf
@@ -185,6 +401,30 @@ class PropertyRow:
     category: Optional[str] = None
     score: Optional[int] = None
 
+WHITESPACE_RE = re.compile(r"\s+")
+ZOOMINFO_LINE_RE = re.compile(
+    r"^(.*?)(?:\s{1,}|\t+)(Reservation System|Property Management Software|Global Distribution System|.*?)(?:\s{1,}|\t+)(\d{1,3})$",
+    re.IGNORECASE,
+)
+
+def hotel_name_key(name: str) -> str:
+    """
+    Whitespace-collapsed, lowercased hotel name; computed once per property and
+    used for de-dupe, the TravelWeekly query and its cache key.
+    """
+    return WHITESPACE_RE.sub(" ", name).strip().lower()
+
+def dedupe_properties(rows: List[PropertyRow]) -> List[PropertyRow]:
+    """
+    Order-preserving de-dupe on hotel_name_key; blank names are dropped.
+    """
+    out: Dict[str, PropertyRow] = {}
+    for r in rows:
+        k = hotel_name_key(r.hotel_name)
+        if k:
+            out.setdefault(k, r)
+    return list(out.values())
+
 def parse_zoominfo_email(body: str) -> List[PropertyRow]:
     """
     Tries to parse a ZoomInfo weekly email body containing a list like:
@@ -200,25 +440,18 @@ def parse_zoominfo_email(body: str) -> List[PropertyRow]:
     # If it looks like HTML with links, parse anchors
     rows: List[PropertyRow] = []
     if "<a" in body.lower() and "</a>" in body.lower():
-        soup = BeautifulSoup(body, "html.parser")
+        tree = html_tree(body)
         # ZoomInfo list usually uses anchors for names
-        anchors = soup.find_all("a")
+        anchors = tree.xpath("//a") if tree is not None else []
         for a in anchors:
-            name = (a.get_text(" ", strip=True) or "").strip()
+            name = element_text(a)
             if not name:
                 continue
             # Ignore obvious navigation links
             if len(name) < 2:
                 continue
             rows.append(PropertyRow(hotel_name=name))
-        # De-dupe while preserving order
-        seen = set()
-        out = []
-        for r in rows:
-            if r.hotel_name.lower() not in seen:
-                seen.add(r.hotel_name.lower())
-                out.append(r)
-        return out
+        return dedupe_properties(rows)
 
     # Plain text fallback:
     # Attempt to capture lines like:
@@ -227,8 +460,8 @@ def parse_zoominfo_email(body: str) -> List[PropertyRow]:
     lines = [ln.strip() for ln in body.splitlines() if ln.strip()]
     # Collapse multiple spaces for regex
     for ln in lines:
-        compact = re.sub(r"\s+", " ", ln).strip()
-        m = re.match(r"^(.*?)(?:\s{1,}|\t+)(Reservation System|Property Management Software|Global Distribution System|.*?)(?:\s{1,}|\t+)(\d{1,3})$", compact, re.IGNORECASE)
+        compact = WHITESPACE_RE.sub(" ", ln).strip()
+        m = ZOOMINFO_LINE_RE.match(compact)
         if m:
             name = m.group(1).strip()
             cat = m.group(2).strip()
@@ -259,16 +492,103 @@ def detect_input_mode(body: str) -> str:
     return "single"
 
 # --- HTTP helpers ---
-async def fetch(url: str, timeout_s: float = 25.0) -> Tuple[int, str]:
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    }
-    async with httpx.AsyncClient(follow_redirects=True, headers=headers, timeout=timeout_s) as c:
-        r = await c.get(url)
-        return r.status_code, (r.text or "")
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def http_client() -> httpx.AsyncClient:
+    """
+    Shared client for every fetch, so repeat hosts (DuckDuckGo, TravelWeekly,
+    vendor domains) reuse pooled keep-alive / HTTP/2 connections instead of a
+    fresh TCP+TLS handshake per request. Created on first use.
+    Accept-Encoding is left to httpx: it offers gzip/deflate, plus br when the
+    brotli extra is installed, so it never advertises a codec it can't decode.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            headers=DEFAULT_HEADERS,
+            timeout=25.0,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# Origins every hotel hits; warming them overlaps DNS/TCP/TLS setup with the
+# batched Gemini call at the start of the run
+PREWARM_ORIGINS = [
+    "https://duckduckgo.com",
+    "https://lite.duckduckgo.com",
+    "https://www.travelweekly.com",
+]
+
+async def prewarm_origins() -> None:
+    async def warm(origin: str) -> None:
+        try:
+            await http_client().head(origin, timeout=10.0)
+        except Exception:
+            pass
+    await asyncio.gather(*(warm(o) for o in PREWARM_ORIGINS))
+
+# Links and block markers sit well inside this; the rest of a huge page is skipped
+FETCH_MAX_BYTES = 512_000
+
+async def _fetch_capped(url: str, timeout_s: float, max_bytes: int) -> Tuple[int, str]:
+    async with http_client().stream("GET", url, timeout=timeout_s) as r:
+        chunks: List[bytes] = []
+        total = 0
+        async for chunk in r.aiter_bytes(65536):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= max_bytes:
+                break
+        body = b"".join(chunks)
+        try:
+            return r.status_code, body.decode(r.charset_encoding or "utf-8", errors="replace")
+        except LookupError:
+            return r.status_code, body.decode("utf-8", errors="replace")
+
+async def fetch(url: str, timeout_s: float = 25.0, max_bytes: int = FETCH_MAX_BYTES) -> Tuple[int, str]:
+    """
+    GET url and return (status, text), reading at most ~max_bytes of the body.
+    httpx's timeout applies per connect/read, so a server trickling bytes can
+    outlast it; timeout_s is also enforced as a deadline for the whole request
+    (raises asyncio.TimeoutError), freeing the hotel/DDG slot and pooled connection.
+    """
+    return await asyncio.wait_for(_fetch_capped(url, timeout_s, max_bytes), timeout=timeout_s)
 
 # --- FREE search: DuckDuckGo HTML + Lite ---
+# Result pages only need anchor hrefs, so scan the raw HTML instead of
+# building a tree; DDG wraps results as //duckduckgo.com/l/?uddg=<url>
+HREF_RE = re.compile(r"""<a\s[^>]*?href\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+UDDG_RE = re.compile(r"[?&]uddg=([^&]+)")
+
+def ddg_result_links(html: str) -> List[str]:
+    """
+    Absolute result URLs from a DuckDuckGo html/lite page, redirect
+    wrappers unwrapped, de-duped in page order.
+    """
+    links = []
+    for m in HREF_RE.finditer(html):
+        href = html_unescape(m.group(1)).strip()
+        wrapped = UDDG_RE.search(href)
+        if wrapped:
+            href = unquote(wrapped.group(1))
+        href = href.split("#", 1)[0]
+        if href.startswith(("http://", "https://")):
+            links.append(href)
+    return dedupe_urls(links)
+
 async def ddg_html_search(query: str) -> List[str]:
     q = quote_plus(query)
     url = f"https://duckduckgo.com/html/?q={q}"
@@ -276,19 +596,7 @@ async def ddg_html_search(query: str) -> List[str]:
         status, html = await fetch(url, timeout_s=25.0)
         if status >= 400 or not html:
             return []
-        soup = BeautifulSoup(html, "html.parser")
-        links = []
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            if href.startswith(("http://", "https://")):
-                links.append(href)
-        # de-dupe
-        out, seen = [], set()
-        for u in links:
-            if u not in seen:
-                seen.add(u)
-                out.append(u)
-        return out
+        return ddg_result_links(html)
     except Exception:
         return []
 
@@ -299,21 +607,24 @@ async def ddg_lite_search(query: str) -> List[str]:
         status, html = await fetch(url, timeout_s=25.0)
         if status >= 400 or not html:
             return []
-        soup = BeautifulSoup(html, "html.parser")
-        links = []
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            if href.startswith(("http://", "https://")):
-                links.append(href)
-        out, seen = [], set()
-        for u in links:
-            if u not in seen:
-                seen.add(u)
-                out.append(u)
-        return out
+        return ddg_result_links(html)
     except Exception:
         return []
 
+# Caps in-flight DuckDuckGo requests across all hotels so the fan-out
+# doesn't trip their rate limiting
+DDG_SEMAPHORE = asyncio.Semaphore(max(1, int(os.environ.get("DDG_CONCURRENCY") or "6")))
+
+async def ddg_search(query: str) -> List[str]:
+    """
+    DuckDuckGo HTML results, falling back to the lite endpoint when empty.
+    """
+    async with DDG_SEMAPHORE:
+        links = await ddg_html_search(query)
+        if not links:
+            links = await ddg_lite_search(query)
+    return links
+
 def build_vendor_queries(hotel_name: str) -> List[str]:
     return [
         f"\"{hotel_name}\" synxis booking",
@@ -326,97 +637,394 @@ def build_vendor_queries(hotel_name: str) -> List[str]:
     ]
 
 # --- TravelWeekly internal search (free) ---
-async def travelweekly_internal_search(hotel_name: str) -> Optional[str]:
-    q = quote_plus(hotel_name)
+async def travelweekly_internal_search(name_key: str) -> Optional[str]:
+    q = quote_plus(name_key)
     url = f"https://www.travelweekly.com/Search?q={q}"
     try:
         status, html = await fetch(url, timeout_s=25.0)
         if status >= 400 or not html:
             return None
-        soup = BeautifulSoup(html, "html.parser")
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
+        for href in anchor_hrefs(html):
             if "/Hotels/" in href and "/Travel-News/" not in href:
                 return urljoin("https://www.travelweekly.com", href)
         return None
     except Exception:
         return None
 
+@dataclass
+class TravelWeeklyPage:
+    url: Optional[str]
+    status: int = 0
+    html: str = ""
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and self.status < 400 and bool(self.html) and not looks_like_bot_block(self.html)
+
+# Listings rarely change, so a readable hotel page is reused across runs
+# for TW_CACHE_TTL_S (default 7 days; 0 re-fetches every time)
+TW_CACHE_DIR = os.path.join(".cache", "travelweekly")
+TW_CACHE_TTL_S = int(os.environ.get("TW_CACHE_TTL_S") or str(7 * 86400))
+
+def _tw_cache_path(name_key: str) -> str:
+    key = hashlib.sha1(name_key.encode("utf-8")).hexdigest()
+    return os.path.join(TW_CACHE_DIR, f"{key}.json")
+
+def tw_cache_get(name_key: str) -> Optional[TravelWeeklyPage]:
+    try:
+        with open(_tw_cache_path(name_key), "rb") as f:
+            entry = json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("ts", 0) > TW_CACHE_TTL_S:
+        return None
+    return TravelWeeklyPage(url=entry.get("url"), status=entry.get("status", 0), html=entry.get("html", ""))
+
+def tw_cache_put(name_key: str, page: TravelWeeklyPage) -> None:
+    """
+    Best-effort: the cache is only an optimisation, so a failed write is logged, not raised.
+    """
+    path = _tw_cache_path(name_key)
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(TW_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(json_dumps({"ts": time.time(), "url": page.url, "status": page.status, "html": page.html}))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ TravelWeekly cache write failed: {e}")
+
+async def travelweekly_hotel_page(name_key: str) -> TravelWeeklyPage:
+    """
+    Finds and fetches the TravelWeekly hotel detail page over plain HTTP.
+    The page is static HTML, so no browser is needed to read it.
+    name_key is hotel_name_key(); it is both the search query and the cache key.
+    Readable pages are cached on disk for TW_CACHE_TTL_S (misses, errors and
+    bot-blocked pages are always re-fetched).
+    """
+    cached = tw_cache_get(name_key)
+    if cached is not None:
+        print("💾 TravelWeekly cache hit.")
+        return cached
+    tw_url = await travelweekly_internal_search(name_key)
+    if not tw_url:
+        return TravelWeeklyPage(url=None)
+    try:
+        status, html = await fetch(tw_url, timeout_s=25.0)
+    except Exception as e:
+        return TravelWeeklyPage(url=tw_url, error=repr(e))
+    page = TravelWeeklyPage(url=tw_url, status=status, html=html)
+    if page.ok:
+        await asyncio.to_thread(tw_cache_put, name_key, page)
+    return page
+
+# TravelWeekly lists GDS codes as e.g. "Sabre: PW 12345  Amadeus: PW 67890"
+TW_GDS_RE = re.compile(r"\b(?:Sabre|Amadeus|Worldspan|Galileo|Apollo)(?:/\w+)?\s*:\s*([A-Z]{2,3})\s+[A-Z0-9]{3,12}\b")
+
+def parse_chain_code_from_travelweekly(html: str) -> Optional[str]:
+    """
+    Returns the chain code published in the page's GDS listing (most common
+    prefix across Sabre/Amadeus/Worldspan/Galileo), or None if absent.
+    """
+    tree = html_tree(html)
+    if tree is None:
+        return None
+    text = element_text(tree)
+    codes = [m.group(1) for m in TW_GDS_RE.finditer(text)]
+    if not codes:
+        return None
+    return Counter(codes).most_common(1)[0][0]
+
 def extract_vendorish_links_from_html(html: str, base_url: str) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
+    tree = html_tree(html)
+    if tree is None:
+        return []
     found = []
-    for tag in soup.find_all(["a", "script", "iframe", "link"]):
-        url = None
-        if tag.name == "a" and tag.get("href"):
-            url = tag.get("href")
-        elif tag.name == "script" and tag.get("src"):
-            url = tag.get("src")
-        elif tag.name == "iframe" and tag.get("src"):
-            url = tag.get("src")
-        elif tag.name == "link" and tag.get("href"):
-            url = tag.get("href")
-
+    for url in tree.xpath("//a/@href | //script/@src | //iframe/@src | //link/@href"):
+        url = str(url).strip()
         if not url:
             continue
 
         full = normalize_url(url, base=base_url)
-        h = host(full)
         # Keep anything that looks vendor/booking/affiliate
-        if any(p.lower() in full.lower() for plist in VENDOR_PATTERNS.values() for p in plist):
-            found.append(full)
-        elif any(a in h for a in AFFILIATE_PATTERNS):
-            found.append(full)
-        elif any(x in full.lower() for x in ["/booking", "/book", "/reservations", "/availability", "reservation"]):
+        if looks_like_vendor_evidence(full, BOOKING_LINK_RE):
             found.append(full)
 
-    out, seen = [], set()
-    for u in found:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
-    return out
+    return dedupe_urls(found)
+
+# --- Gemini: on-disk response cache (exact prompt match) ---
+GEMINI_CACHE_DIR = os.path.join(".cache", "gemini")
+# On by default; GEMINI_CACHE=0 forces every prompt to the API (e.g. in CI)
+GEMINI_CACHE_ENABLED = (os.environ.get("GEMINI_CACHE") or "1").strip() != "0"
+# Seconds before a cached answer is re-asked; 0 keeps entries forever
+GEMINI_CACHE_TTL_S = int(os.environ.get("GEMINI_CACHE_TTL_S") or "0")
+
+def _cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+def _cache_path(model: str, prompt: str) -> str:
+    return os.path.join(GEMINI_CACHE_DIR, f"{_cache_key(model, prompt)}.json")
+
+def cache_get(model: str, prompt: str) -> Optional[str]:
+    if not GEMINI_CACHE_ENABLED:
+        return None
+    try:
+        with open(_cache_path(model, prompt), "rb") as f:
+            entry = json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if GEMINI_CACHE_TTL_S and time.time() - entry.get("ts", 0) > GEMINI_CACHE_TTL_S:
+        return None
+    return entry.get("text")
+
+def cache_put(model: str, prompt: str, text: str) -> None:
+    """
+    Best-effort: a failed write is logged, never turned into a failed Gemini call.
+    """
+    if not GEMINI_CACHE_ENABLED:
+        return
+    path = _cache_path(model, prompt)
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(GEMINI_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(json_dumps({"model": model, "ts": time.time(), "text": text}))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ Gemini cache write failed: {e}")
+
+def cache_drop(model: str, prompt: str) -> None:
+    try:
+        os.remove(_cache_path(model, prompt))
+    except OSError:
+        pass
+
+class SharedCallCancelled(Exception):
+    """The task that owned an in-flight Gemini call was cancelled."""
+
+# Live Gemini calls by cache key, so concurrent identical prompts share one
+_gemini_inflight: Dict[str, "asyncio.Future[str]"] = {}
+
+async def cached_generate(model: str, prompt: str) -> str:
+    """
+    Returns Gemini's raw response text, served from disk when this exact
+    (model, prompt) pair was answered before.
+    """
+    cached = cache_get(model, prompt)
+    if cached is not None:
+        print("💾 Gemini cache hit.")
+        return cached
+
+    # Same prompt already on the wire (e.g. duplicate hotels running
+    # concurrently): wait for that answer instead of paying for a second one.
+    key = _cache_key(model, prompt)
+    while key in _gemini_inflight:
+        try:
+            # shield: a cancelled waiter must not cancel the shared call for the others
+            return await asyncio.shield(_gemini_inflight[key])
+        except SharedCallCancelled:
+            pass  # owner was cancelled, not us: join the next owner or make the call
+
+    fut = asyncio.get_running_loop().create_future()
+    _gemini_inflight[key] = fut
+    try:
+        async with gemini_slot():
+            resp = await gemini_client().aio.models.generate_content(model=model, contents=prompt, config=GEMINI_JSON_CONFIG)
+        text = resp.text or ""
+        await asyncio.to_thread(cache_put, model, prompt, text)
+        fut.set_result(text)
+        return text
+    except asyncio.CancelledError:
+        # Waiters weren't cancelled themselves, so they mustn't see CancelledError
+        fut.set_exception(SharedCallCancelled("shared Gemini call cancelled"))
+        fut.exception()
+        raise
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # mark retrieved; waiters (if any) still get it
+        raise
+    finally:
+        _gemini_inflight.pop(key, None)
+
+# Outermost {...} of the reply; skips any ```json / ```python fences or prose around it
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+def _json_object_text(text: str) -> str:
+    m = JSON_OBJECT_RE.search(text or "")
+    return m.group(0) if m else (text or "").strip()
+
+# Upper bound on wall time spent retrying a single prompt
+GEMINI_RETRY_BUDGET_S = 25.0
+
+def _gemini_retryable(e: Exception) -> bool:
+    """
+    Quota (429), server (5xx), transport errors and unparseable replies are
+    worth another try; other API errors (bad request, auth) are not.
+    """
+    if isinstance(e, genai_errors.APIError):
+        return e.code == 429 or (e.code or 0) >= 500
+    return isinstance(e, (ValueError, httpx.TransportError, asyncio.TimeoutError))
+
+GEMINI_BACKOFF_CAP_S = 8.0
+# Left unslept at the end of GEMINI_RETRY_BUDGET_S so the last attempt fits
+GEMINI_DEADLINE_MARGIN_S = 1.0
+# Longest server-requested wait honoured; a quota hint may run past the budget up to this
+GEMINI_MAX_RETRY_HINT_S = 60.0
+# Quota errors carry google.rpc.RetryInfo in the error details, e.g. "retryDelay": "37s"
+RETRY_DELAY_RE = re.compile(r"""retry_?delay['"]?\s*[:=]\s*['"]?(\d+(?:\.\d+)?)s""", re.IGNORECASE)
+
+def _retry_after_s(e: Exception) -> Optional[float]:
+    """
+    Server's retry hint in seconds: the Retry-After header, else RetryInfo's
+    retryDelay from the error body. Capped at GEMINI_MAX_RETRY_HINT_S.
+    """
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    try:
+        hint = float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        hint = None
+    if hint is None:
+        m = RETRY_DELAY_RE.search(str(getattr(e, "details", None) or e))
+        hint = float(m.group(1)) if m else None
+    return min(hint, GEMINI_MAX_RETRY_HINT_S) if hint is not None else None
+
+async def gemini_json(prompt: str, label: str, attempts: int = 3) -> Optional[dict]:
+    """
+    Sends one prompt to Gemini and returns the parsed JSON object (or None).
+    Responses come from cached_generate, so repeat prompts skip the API;
+    live calls are paced by gemini_slot(). Only retryable failures are
+    retried: after the server's retry hint in full (which may stretch the
+    GEMINI_RETRY_BUDGET_S deadline, up to GEMINI_MAX_RETRY_HINT_S per wait),
+    otherwise with full-jitter exponential backoff within the budget.
+    """
+    if not gemini_client():
+        return None
+    deadline = time.monotonic() + GEMINI_RETRY_BUDGET_S
+    for attempt in range(1, attempts + 1):
+        try:
+            print(f"🤖 Gemini {label} (attempt {attempt}/{attempts})...")
+            data = json_loads(_json_object_text(await cached_generate(GEMINI_MODEL, prompt)))
+            if not isinstance(data, dict):
+                raise ValueError(f"expected JSON object, got {type(data).__name__}")
+            return data
+        except Exception as e:
+            # Don't let an unparseable answer stick in the cache
+            cache_drop(GEMINI_MODEL, prompt)
+            print(f"⏳ Gemini {label} failed: {e}")
+            if attempt == attempts or not _gemini_retryable(e):
+                break
+            hint = _retry_after_s(e)
+            if hint:
+                # Quota hints (often 30s+) may outlast the budget; retrying before
+                # the window resets just earns another 429, so wait the full hint
+                # (already capped at GEMINI_MAX_RETRY_HINT_S) and extend the deadline
+                deadline = max(deadline, time.monotonic() + hint + GEMINI_DEADLINE_MARGIN_S)
+                await asyncio.sleep(hint)
+                continue
+            # Full jitter keeps concurrent workers from retrying in lockstep
+            delay = random.uniform(0, min(2 ** attempt, GEMINI_BACKOFF_CAP_S))
+            remaining = deadline - time.monotonic() - GEMINI_DEADLINE_MARGIN_S
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
+    return None
 
 # --- Gemini: Chain code only (simple, focused) ---
-async def gemini_chain_code_only(hotel_name: str) -> str:
-    if not client:
-        return "UNKNOWN"
-    prompt = (
+def chain_code_prompt(hotel_name: str) -> str:
+    return (
         f"What is the GDS chain code for '{hotel_name}'?\n"
         "Return ONLY JSON: {\"chain_code\": \"PW\"}.\n"
         "chain_code must be 2-3 uppercase letters, or null if unknown."
     )
-    for attempt in range(1, 4):
-        try:
-            print(f"🤖 Gemini chain code (attempt {attempt}/3)...")
-            resp = client.models.generate_content(model="gemini-2.0-flash", contents=prompt)
-            text = (resp.text or "").strip()
-            text = text.replace("```json", "").replace("```", "").strip()
-            data = json.loads(text)
-            cc = (data.get("chain_code") or "").strip()
-            return cc or "UNKNOWN"
-        except Exception as e:
-            print(f"⏳ Gemini chain code failed: {e}")
-            await asyncio.sleep(6 * attempt)
-    return "UNKNOWN"
+
+async def gemini_chain_code_only(hotel_name: str) -> str:
+    data = await gemini_json(chain_code_prompt(hotel_name), "chain code")
+    if not data:
+        return "UNKNOWN"
+    cc = (data.get("chain_code") or "").strip()
+    return cc or "UNKNOWN"
 
 # --- Gemini: official URL (optional helper) ---
+def official_url_prompt(hotel_name: str) -> str:
+    return f"Provide the official website URL for '{hotel_name}'. Return ONLY JSON: {{\"url\": \"https://example.com\"}}"
+
 async def gemini_official_url(hotel_name: str) -> Optional[str]:
-    if not client:
+    data = await gemini_json(official_url_prompt(hotel_name), "official URL")
+    if not data:
         return None
-    prompt = f"Provide the official website URL for '{hotel_name}'. Return ONLY JSON: {{\"url\": \"https://example.com\"}}"
-    for attempt in range(1, 4):
-        try:
-            print(f"🤖 Gemini official URL (attempt {attempt}/3)...")
-            resp = client.models.generate_content(model="gemini-2.0-flash", contents=prompt)
-            text = (resp.text or "").strip()
-            text = text.replace("```json", "").replace("```", "").strip()
-            data = json.loads(text)
-            u = (data.get("url") or "").strip()
-            return normalize_url(u) if u else None
-        except Exception as e:
-            print(f"⏳ Gemini official URL failed: {e}")
-            await asyncio.sleep(6 * attempt)
-    return None
+    u = (data.get("url") or "").strip()
+    return normalize_url(u) if u else None
+
+# --- Gemini: chain code + official URL for a whole list in one call ---
+@dataclass
+class GeminiFacts:
+    chain_code: Optional[str] = None
+    official_url: Optional[str] = None
+
+# Batch answers are stored per hotel (in the Gemini response cache, under a
+# name key rather than a prompt) so a changed list only asks for new names
+def _facts_cache_key(name: str) -> str:
+    return f"property facts\0{hotel_name_key(name)}"
+
+def facts_cache_get(name: str) -> Optional[GeminiFacts]:
+    raw = cache_get(GEMINI_MODEL, _facts_cache_key(name))
+    if raw is None:
+        return None
+    try:
+        d = json_loads(raw)
+    except ValueError:
+        return None
+    return GeminiFacts(chain_code=d.get("chain_code"), official_url=d.get("official_url"))
+
+def facts_cache_put(facts_by_name: Dict[str, GeminiFacts]) -> None:
+    for name, facts in facts_by_name.items():
+        cache_put(GEMINI_MODEL, _facts_cache_key(name), json_dumps(asdict(facts)).decode())
+
+async def gemini_property_facts_batch(names: List[str]) -> Dict[str, GeminiFacts]:
+    """
+    Asks for every hotel's chain code and official URL in a single prompt
+    (one hotel included, so a single-property run is one call, not two).
+    Returns {hotel_name: GeminiFacts} for names answered now or in an earlier
+    batch. Names whose per-hotel prompts are already cached are skipped, and
+    fields left null are filled in by the per-hotel helpers instead.
+    """
+    out: Dict[str, GeminiFacts] = {}
+    pending = []
+    for n in names:
+        cached = facts_cache_get(n)
+        if cached is not None:
+            out[n] = cached
+        elif (cache_get(GEMINI_MODEL, chain_code_prompt(n)) is None
+              or cache_get(GEMINI_MODEL, official_url_prompt(n)) is None):
+            pending.append(n)
+    if out:
+        print(f"💾 Property facts cached for {len(out)} hotel(s).")
+    if not gemini_client() or not pending:
+        return out
+    prompt = (
+        "For each hotel in NAMES, give its GDS chain code and official website URL.\n"
+        "Return ONLY JSON: {\"results\": [{\"name\": \"<name exactly as in NAMES>\", "
+        "\"chain_code\": \"PW\", \"official_url\": \"https://example.com\"}]}.\n"
+        "chain_code must be 2-3 uppercase letters, or null if unknown. official_url is null if unknown.\n"
+        f"NAMES={json_dumps(pending).decode()}"
+    )
+    data = await gemini_json(prompt, f"property facts batch ({len(pending)} hotels)")
+    by_key = {hotel_name_key(n): n for n in pending}
+    answered: Dict[str, GeminiFacts] = {}
+    for item in (data or {}).get("results") or []:
+        if not isinstance(item, dict):
+            continue
+        name = by_key.get(hotel_name_key(str(item.get("name") or "")))
+        if not name:
+            continue
+        cc = str(item.get("chain_code") or "").strip()
+        u = str(item.get("official_url") or "").strip()
+        answered[name] = GeminiFacts(chain_code=cc or None, official_url=normalize_url(u) if u else None)
+    if answered:
+        await asyncio.to_thread(facts_cache_put, answered)
+    out.update(answered)
+    return out
 
 # --- Per-property booking vendor fingerprinting ---
 @dataclass
@@ -428,27 +1036,15 @@ class BookingFinding:
     confidence: str
     notes: str
 
-async def fingerprint_booking_vendor(hotel_name: str) -> BookingFinding:
+async def official_site_evidence(hotel_name: str, official_url: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """
+    Official website HTML (via Gemini URL) -> scripts/iframes/booking links.
+    official_url comes from the batched lookup; if absent we ask per hotel.
+    Returns (evidence_urls, notes).
+    """
     evidence: List[str] = []
     notes: List[str] = []
-
-    # 1) TravelWeekly hotel page -> extract vendor-ish links
-    tw_url = await travelweekly_internal_search(hotel_name)
-    if tw_url:
-        notes.append(f"TravelWeekly hotel page found.")
-        try:
-            status, html = await fetch(tw_url, timeout_s=25.0)
-            if status < 400 and html and not looks_like_bot_block(html):
-                evidence.extend(extract_vendorish_links_from_html(html, tw_url))
-            else:
-                notes.append(f"TravelWeekly fetch blocked/unavailable (HTTP {status}).")
-        except Exception as e:
-            notes.append(f"TravelWeekly fetch error: {repr(e)}")
-    else:
-        notes.append("TravelWeekly hotel page not found.")
-
-    # 2) Official website HTML (via Gemini URL) -> look for scripts/iframes/booking links
-    official_url = await gemini_official_url(hotel_name)
+    official_url = official_url or await gemini_official_url(hotel_name)
     if official_url:
         notes.append(f"Official URL candidate: {official_url}")
         try:
@@ -464,32 +1060,111 @@ async def fingerprint_booking_vendor(hotel_name: str) -> BookingFinding:
             notes.append(f"Official site fetch error: {repr(e)}")
     else:
         notes.append("Official URL not available from Gemini.")
+    return evidence, notes
 
-    # 3) Free search (DuckDuckGo HTML + lite fallback) -> collect vendor/affiliate/booking URLs
-    for q in build_vendor_queries(hotel_name):
-        links = await ddg_html_search(q)
-        if not links:
-            links = await ddg_lite_search(q)
-        # Keep only strong candidates (vendor/affiliate/booking-ish)
-        for u in links[:25]:
-            u2 = normalize_url(u)
-            if not u2:
-                continue
-            h = host(u2)
-            if any(p.lower() in u2.lower() for plist in VENDOR_PATTERNS.values() for p in plist):
-                evidence.append(u2)
-            elif any(a in h for a in AFFILIATE_PATTERNS):
-                evidence.append(u2)
-            elif any(x in u2.lower() for x in ["/booking", "/book", "/reservations", "reservation", "availability"]):
-                evidence.append(u2)
+# Vendor patterns that are whole domains; loose literals like "shr" are left out
+VENDOR_DOMAINS = tuple(p for ps in VENDOR_PATTERNS.values() for p in ps if "." in p and "/" not in p)
+
+def is_vendor_host(url: str) -> bool:
+    h = host(url)
+    return any(h == d or h.endswith("." + d) for d in VENDOR_DOMAINS)
+
+def is_strong_vendor_hit(url: str) -> bool:
+    """
+    Vendor domain in the host plus a booking hint: the top score
+    best_vendor_from_evidence can give, so no later evidence can outrank it.
+
+    A vendor host without a booking hint (e.g. be.synxis.com/?hotel=1) does not
+    qualify, because a later hinted URL would outscore it; such hotels run the
+    remaining sources before picking a vendor.
+    """
+    if not is_vendor_host(url):
+        return False
+    return score_evidence_url(url)[0] >= VENDOR_MATCH_SCORE + BOOKING_HINT_SCORE
+
+def has_strong_vendor_hit(urls: List[str]) -> bool:
+    return any(is_strong_vendor_hit(u) for u in urls)
+
+# Stop searching once this many distinct vendor-host URLs are in hand
+DDG_ENOUGH_VENDOR_HITS = 3
+
+def keep_evidence_links(links: List[str]) -> List[str]:
+    """
+    Keep only strong candidates (vendor/affiliate/booking-ish) from search results.
+    """
+    out = []
+    for u in links[:25]:
+        u2 = normalize_url(u)
+        if u2 and looks_like_vendor_evidence(u2):
+            out.append(u2)
+    return out
+
+async def search_engine_evidence(hotel_name: str) -> List[str]:
+    """
+    Free search (DuckDuckGo HTML + lite fallback) -> vendor/affiliate/booking URLs.
+    Queries run concurrently (DDG_SEMAPHORE caps the load); once enough vendor
+    hits are in, the still-pending queries are cancelled.
+    """
+    queries = build_vendor_queries(hotel_name)
+    tasks = [asyncio.create_task(ddg_search(q)) for q in queries]
+    slot = {t: i for i, t in enumerate(tasks)}
+    results: List[List[str]] = [[] for _ in queries]
+    vendor_hits = set()
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                links = keep_evidence_links(t.result())
+                results[slot[t]] = links
+                vendor_hits.update(u for u in links if is_vendor_host(u))
+            if len(vendor_hits) >= DDG_ENOUGH_VENDOR_HITS:
+                break
+    finally:
+        for t in pending:
+            t.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    # Merge in query order (most vendor-specific first), not completion order
+    return [u for links in results for u in links]
+
+async def fingerprint_booking_vendor(hotel_name: str, tw: TravelWeeklyPage, official_url: Optional[str] = None) -> BookingFinding:
+    evidence: List[str] = []
+    notes: List[str] = []
+
+    # 1) TravelWeekly hotel page -> extract vendor-ish links
+    if tw.url:
+        notes.append(f"TravelWeekly hotel page found.")
+        if tw.error:
+            notes.append(f"TravelWeekly fetch error: {tw.error}")
+        elif tw.ok:
+            evidence.extend(extract_vendorish_links_from_html(tw.html, tw.url))
+        else:
+            notes.append(f"TravelWeekly fetch blocked/unavailable (HTTP {tw.status}).")
+    else:
+        notes.append("TravelWeekly hotel page not found.")
+
+    # 2) Official website and 3) free search don't depend on each other: run both at once.
+    # A strong vendor hit from an earlier source can't be outscored, so later ones are skipped/cancelled.
+    if has_strong_vendor_hit(evidence):
+        notes.append("Vendor found on TravelWeekly; skipped official-site and search lookups.")
+    else:
+        search_task = asyncio.create_task(search_engine_evidence(hotel_name))
+        try:
+            site_evidence, site_notes = await official_site_evidence(hotel_name, official_url)
+            notes.extend(site_notes)
+            evidence.extend(site_evidence)
+            if has_strong_vendor_hit(site_evidence):
+                notes.append("Vendor found on official site; skipped search lookups.")
+            else:
+                evidence.extend(await search_task)
+        finally:
+            if not search_task.done():
+                search_task.cancel()
+                await asyncio.gather(search_task, return_exceptions=True)
 
     # De-dupe evidence
-    dedup, seen = [], set()
-    for u in evidence:
-        if u not in seen:
-            seen.add(u)
-            dedup.append(u)
-    evidence = dedup
+    evidence = dedupe_urls(evidence)
 
     vendor, vendor_url, conf = best_vendor_from_evidence(evidence)
 
@@ -545,7 +1220,50 @@ def write_excel(filename: str, rows: List[dict]) -> None:
 
     wb.save(os.path.join(ART_DIR, filename))
 
+async def process_property(idx: int, total: int, prop: PropertyRow, facts: Optional[GeminiFacts] = None) -> Tuple[dict, dict]:
+    """
+    Runs the per-hotel lookups and returns (excel_row, booking_finding_dict).
+    facts come from the batched Gemini lookup; missing fields are asked per hotel.
+    """
+    facts = facts or GeminiFacts()
+    hotel_name = prop.hotel_name.strip()
+    print(f"\n🏨 [{idx}/{total}] Processing: {hotel_name}")
+
+    # 1) TravelWeekly hotel page (plain HTTP)
+    tw = await travelweekly_hotel_page(hotel_name_key(hotel_name))
+
+    # 2) GDS chain code (published TravelWeekly listing first, then Gemini) and
+    # 3) booking vendor fingerprint only depend on tw, so run them together
+    tw_chain_code = parse_chain_code_from_travelweekly(tw.html) if tw.ok else None
+    chain_code = tw_chain_code or facts.chain_code
+    if chain_code:
+        finding = await fingerprint_booking_vendor(hotel_name, tw, facts.official_url)
+    else:
+        chain_code, finding = await asyncio.gather(
+            gemini_chain_code_only(hotel_name),
+            fingerprint_booking_vendor(hotel_name, tw, facts.official_url),
+        )
+    print(f"   ✅ [{idx}/{total}] Chain code: {chain_code}" + (" (TravelWeekly)" if tw_chain_code else ""))
+    print(f"   ✅ [{idx}/{total}] Booking vendor: {finding.vendor} ({finding.confidence})")
+
+    row = {
+        "hotel_name": hotel_name,
+        "zoominfo_category": prop.category or "",
+        "zoominfo_score": prop.score if prop.score is not None else "",
+        "gds_chain_code": chain_code,
+        "booking_vendor": finding.vendor,
+        "vendor_evidence_url": finding.vendor_evidence_url,
+        "confidence": finding.confidence,
+        "notes": finding.notes,
+    }
+    return row, asdict(finding)
+
 async def main():
+    print(f"🔥 HOTEL AGENT VERSION: {VERSION} 🔥")
+    os.makedirs(ART_DIR, exist_ok=True)
+    # Ensure at least one artifact exists
+    write_text("RUN_STATUS.txt", "starting\n")
+
     if not EMAIL_INPUT:
         write_text("RUN_STATUS.txt", "EMAIL_INPUT missing\n")
         print("❌ EMAIL_INPUT missing.")
@@ -562,53 +1280,42 @@ async def main():
     else:
         properties = [PropertyRow(hotel_name=EMAIL_INPUT)]
 
-    # De-dupe and keep order
-    seen = set()
-    clean_props = []
-    for p in properties:
-        k = p.hotel_name.strip().lower()
-        if not k or k in seen:
-            continue
-        seen.add(k)
-        clean_props.append(p)
-    properties = clean_props
+    properties = dedupe_properties(properties)
 
     write_json("PARSED_PROPERTIES.json", [asdict(p) for p in properties])
     print(f"✅ Parsed {len(properties)} propertie(s).")
 
-    output_rows = []
-    all_booking_findings = []
-
-    # Process sequentially for stability (easy to parallelize later)
-    for idx, prop in enumerate(properties, start=1):
-        hotel_name = prop.hotel_name.strip()
-        print(f"\n🏨 [{idx}/{len(properties)}] Processing: {hotel_name}")
-
-        # 1) GDS chain code
-        chain_code = await gemini_chain_code_only(hotel_name)
-        print(f"   ✅ Chain code: {chain_code}")
-
-        # 2) Booking vendor fingerprint
-        finding = await fingerprint_booking_vendor(hotel_name)
-        all_booking_findings.append(asdict(finding))
-        print(f"   ✅ Booking vendor: {finding.vendor} ({finding.confidence})")
-
-        output_rows.append({
-            "hotel_name": hotel_name,
-            "zoominfo_category": prop.category or "",
-            "zoominfo_score": prop.score if prop.score is not None else "",
-            "gds_chain_code": chain_code,
-            "booking_vendor": finding.vendor,
-            "vendor_evidence_url": finding.vendor_evidence_url,
-            "confidence": finding.confidence,
-            "notes": finding.notes,
-        })
-
-        # Update run status continuously so you always get something
-        write_text("RUN_STATUS.txt", f"processed {idx}/{len(properties)}\n")
-
-    write_json("BOOKING_EVIDENCE.json", all_booking_findings)
-    write_excel("HOTEL_OUTPUT.xlsx", output_rows)
+    # One Gemini call covers chain codes + official URLs for the whole list;
+    # meanwhile open pooled connections to the search/TravelWeekly hosts.
+    # The warm-up is fire-and-forget: nothing below waits for it.
+    prewarm = asyncio.create_task(prewarm_origins())
+    try:
+        batch_facts = await gemini_property_facts_batch([p.hotel_name.strip() for p in properties])
+
+        # Process concurrently, capped at HOTEL_CONCURRENCY in flight so large
+        # lists don't fan out into hundreds of simultaneous lookups.
+        sem = asyncio.Semaphore(HOTEL_CONCURRENCY)
+        done = 0
+
+        async def run_one(idx: int, prop: PropertyRow) -> Tuple[dict, dict]:
+            nonlocal done
+            async with sem:
+                row, finding = await process_property(idx, len(properties), prop, batch_facts.get(prop.hotel_name.strip()))
+            done += 1
+            # Update run status continuously so you always get something
+            await write_text_async("RUN_STATUS.txt", f"processed {done}/{len(properties)}\n")
+            return row, finding
+
+        results = await asyncio.gather(*(run_one(idx, p) for idx, p in enumerate(properties, start=1)))
+    finally:
+        prewarm.cancel()
+        await asyncio.gather(prewarm, return_exceptions=True)
+        await close_http_client()
+    output_rows = [row for row, _ in results]
+    all_booking_findings = [finding for _, finding in results]
+
+    await write_json_async("BOOKING_EVIDENCE.json", all_booking_findings)
+    await asyncio.to_thread(write_excel, "HOTEL_OUTPUT.xlsx", output_rows)
 
     write_text("RUN_STATUS.txt", "done\n")
     print("\n✅ Done. Saved: screenshots/HOTEL_OUTPUT.xlsx")
@@ -617,6 +1324,7 @@ if __name__ == "__main__":
     try:
         asyncio.run(main())
     except Exception as e:
+        os.makedirs(ART_DIR, exist_ok=True)
         write_text("CRASH.txt", f"Script crashed:\n{repr(e)}\n")
         raise
 